@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'smileApp.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -89,6 +91,54 @@ DATABASES = {
     }
 }
 
+# Read replicas. Safe-method API requests, reports and exports read from these
+# (see smileApp/db_router.py); writes always go to 'default'.
+#
+# Local testing with SQLite: copy the primary and point SMILE_REPLICA_DBS at it
+#   cp db.sqlite3 db_replica.sqlite3
+#   SMILE_REPLICA_DBS=db_replica.sqlite3 python manage.py runserver
+# The replica routing tests run only when a replica is configured, e.g. with
+#   python manage.py test --settings=Smile.test_settings
+#
+# For PostgreSQL add the replicas here instead, e.g.
+#   DATABASES['replica1'] = {'ENGINE': 'django.db.backends.postgresql', 'HOST': 'localhost',
+#                            'PORT': 5433, 'NAME': 'smile', ..., 'TEST': {'MIRROR': 'default'}}
+#   REPLICA_DATABASES.append('replica1')
+REPLICA_DATABASES = []
+for index, name in enumerate(filter(None, os.environ.get('SMILE_REPLICA_DBS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['smileApp.db_router.PrimaryReplicaRouter']
+
+# Reads go to the primary for this long after a user's POST/PUT/PATCH/DELETE.
+# Pins are kept in the cache, so use a shared cache (not LocMem) when running
+# several worker processes.
+REPLICA_PIN_SECONDS = 10
+# Replicas further behind than this are skipped; lag is re-checked at most
+# once per REPLICA_HEALTH_CHECK_INTERVAL seconds.
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+
+# Archiving (manage.py archive_inactive). Children marked Inactive are moved
+# to the archive tables once untouched for this many days; enrollments once
+# they ended this many days ago. Default managers hide both in the meantime.
+ARCHIVE_EXITED_CHILDREN_AFTER_DAYS = 30
+ARCHIVE_CLOSED_ENROLLMENTS_AFTER_DAYS = 730
+
+# Fee forecasting (smileApp/forecasting.py). Terms split the year into equal
+# runs of months; program cost is estimated per billable child per term.
+# Cached enrollments are keyed by a data version stored in the database
+# (smileApp.DataVersion), so a per-process cache such as the default LocMem
+# never serves data older than the latest change, whichever process made it.
+FORECAST_TERMS_PER_YEAR = 3
+FORECAST_COST_PER_CHILD = 0
+FORECAST_CACHE_TIMEOUT = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -108,6 +158,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = ['smileApp.auth_backends.PooledModelBackend']
+
+# Sign-in (smileApp/auth_backends.py, smileApp/throttling.py).
+# This is a per-process concurrency cap: at most LOGIN_HASH_WORKERS password
+# hashes run at once and up to LOGIN_HASH_QUEUE_SIZE more wait, for at most
+# LOGIN_HASH_QUEUE_TIMEOUT seconds, before the login is refused (429 on
+# /api/token/). Every waiting login holds a request thread, so keep
+# WORKERS + QUEUE_SIZE well below the server's threads per process.
+LOGIN_HASH_WORKERS = int(os.environ.get('SMILE_LOGIN_HASH_WORKERS', 2))
+LOGIN_HASH_QUEUE_SIZE = int(os.environ.get('SMILE_LOGIN_HASH_QUEUE_SIZE', 4))
+LOGIN_HASH_QUEUE_TIMEOUT = 0.5
+# Re-hash passwords stored with outdated hasher settings when users log in.
+LOGIN_REHASH_PASSWORDS = True
+# Token buckets for /api/token/: `burst` attempts, refilled at `per_second`.
+LOGIN_THROTTLE_RATES = {
+    'ip': {'burst': 30, 'per_second': 2},
+    'username': {'burst': 5, 'per_second': 0.1},
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -134,9 +203,54 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'smileApp.authentication.ReplicaAwareJWTAuthentication',
     ),
 }
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+#
+# smileApp records go through a queue to a background writer thread, so
+# request threads never block on I/O. Access grants (DEBUG) are sampled 1 in
+# LOG_ALLOW_SAMPLE_RATE when enabled; denials (INFO) are always written.
+# Records arriving while LOG_QUEUE_SIZE are already waiting are dropped.
+
+LOG_LEVEL = os.environ.get('SMILE_LOG_LEVEL', 'INFO')
+LOG_ALLOW_SAMPLE_RATE = 100
+LOG_QUEUE_SIZE = 10000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            '()': 'smileApp.logging_utils.StructuredFormatter',
+        },
+    },
+    'filters': {
+        'sample_allow': {
+            '()': 'smileApp.logging_utils.SampleAllowFilter',
+            'rate': LOG_ALLOW_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'background': {
+            'class': 'smileApp.logging_utils.BackgroundQueueHandler',
+            'stream': 'ext://sys.stderr',
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'structured',
+            'filters': ['sample_allow'],
+        },
+    },
+    'loggers': {
+        'smileApp': {
+            'handlers': ['background'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
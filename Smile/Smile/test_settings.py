@@ -0,0 +1,13 @@
+"""
+Settings for running the test suite with a read replica, so the replica
+routing tests run:
+
+    python manage.py test --settings=Smile.test_settings
+
+The replica is a mirror of the test database; no second database is needed.
+"""
+from .settings import *  # noqa: F401,F403
+
+if not REPLICA_DATABASES:
+    DATABASES['replica1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append('replica1')
@@ -6,6 +6,8 @@ from .models import (
     Program,
     ChildProgram,
     Staff,
+    ArchivedChild,
+    ArchivedChildProgram,
 )
 
 @admin.register(Child)
@@ -14,6 +16,11 @@ class ChildAdmin(admin.ModelAdmin):
     search_fields = ('first_name', 'last_name', 'guardian_name')
     list_filter = ('status', 'gender')
 
+    def get_queryset(self, request):
+        # Staff need to reach exited children (e.g. to undo a mistaken exit)
+        # until archive_inactive moves them out.
+        return Child.all_objects.all()
+
 @admin.register(Sponsor)
 class SponsorAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'phone', 'sponsor_type', 'preferred_contact')
@@ -36,6 +43,9 @@ class ChildProgramAdmin(admin.ModelAdmin):
     list_filter = ('program', 'start_date')
     search_fields = ('child__first_name', 'program__title')
 
+    def get_queryset(self, request):
+        return ChildProgram.all_objects.all()
+
 @admin.register(Staff)
 class StaffAdmin(admin.ModelAdmin):
     list_display = ('get_username', 'get_groups', 'position', 'is_volunteer', 'phone', 'created_at')
@@ -51,3 +61,15 @@ class StaffAdmin(admin.ModelAdmin):
     def get_groups(self, obj):
         groups = obj.name.groups.values_list('name', flat=True)
         return ", ".join(groups) if groups else 'No Group'
+
+@admin.register(ArchivedChild)
+class ArchivedChildAdmin(admin.ModelAdmin):
+    list_display = ('first_name', 'last_name', 'gender', 'status', 'entry_date', 'archived_at')
+    search_fields = ('first_name', 'last_name', 'guardian_name')
+    list_filter = ('gender', 'archived_at')
+
+@admin.register(ArchivedChildProgram)
+class ArchivedChildProgramAdmin(admin.ModelAdmin):
+    list_display = ('original_child_id', 'program', 'level', 'start_date', 'end_date', 'archived_at')
+    list_filter = ('program', 'end_date')
+    search_fields = ('archived_child__first_name', 'program__title')
@@ -5,5 +5,4 @@ class SmileAppConfig(AppConfig):
     name = 'smileApp'
 
     def ready(self):
-        pass
-        #import smileApp.signals  # Make sure this line is indented inside the method
+        import smileApp.signals  # Make sure this line is indented inside the method
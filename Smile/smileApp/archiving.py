@@ -0,0 +1,132 @@
+"""
+Moves exited children and long-closed enrollments out of the live tables.
+
+Each batch runs in its own transaction: rows are copied into the archive
+tables, photos are copied under `archive/` in storage, and the live rows are
+deleted. The original photo files are removed only after the batch commits.
+The forecast data version is bumped once per batch rather than per row.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Child, ChildProgram, ChildStatus, ArchivedChild, ArchivedChildProgram
+from .forecasting import bump_data_version
+from .signals import forecast_receivers_disconnected
+
+logger = logging.getLogger(__name__)
+
+CHILD_FIELDS = (
+    'first_name', 'last_name', 'gender', 'birth_date', 'status', 'entry_date', 'address',
+    'guardian_name', 'guardian_contact', 'reason', 'created_at', 'updated_at',
+)
+ENROLLMENT_FIELDS = (
+    'program_id', 'level', 'assesment', 'location', 'start_date', 'end_date', 'fees_per_term',
+)
+
+
+def exited_children_due():
+    cutoff = timezone.now() - timedelta(days=settings.ARCHIVE_EXITED_CHILDREN_AFTER_DAYS)
+    return Child.all_objects.exited().filter(updated_at__lt=cutoff)
+
+
+def closed_enrollments_due():
+    # Enrollments of exited children are archived together with the child.
+    return ChildProgram.all_objects.closed().exclude(child__status=ChildStatus.EXITED)
+
+
+def _archive_enrollments(enrollments):
+    ArchivedChildProgram.objects.bulk_create([
+        ArchivedChildProgram(
+            original_id=enrollment.pk,
+            original_child_id=enrollment.child_id,
+            **{field: getattr(enrollment, field) for field in ENROLLMENT_FIELDS},
+        )
+        for enrollment in enrollments
+    ])
+
+
+def _copy_photo(child):
+    """Copies the child's photo under archive/ and returns the new name."""
+    photo = child.image_data
+    name = 'archive/' + photo.name
+    with photo.open('rb') as source:
+        return photo.storage.save(name, source)
+
+
+def _archive_child_batch(batch_size):
+    """Archives one batch of exited children. Returns the number archived."""
+    copied = []
+    try:
+        with forecast_receivers_disconnected(), transaction.atomic():
+            children = list(exited_children_due().order_by('pk').select_for_update()[:batch_size])
+            ids = [child.pk for child in children]
+
+            archived = []
+            for child in children:
+                photo_name = None
+                if child.image_data and child.image_data.storage.exists(child.image_data.name):
+                    photo_name = _copy_photo(child)
+                    copied.append((child.image_data.storage, photo_name))
+                archived.append(ArchivedChild(
+                    original_id=child.pk,
+                    image_data=photo_name,
+                    **{field: getattr(child, field) for field in CHILD_FIELDS},
+                ))
+
+            ArchivedChild.objects.bulk_create(archived)
+            _archive_enrollments(ChildProgram.all_objects.filter(child_id__in=ids))
+            # Link these children's enrollments, including ones archived earlier.
+            ArchivedChildProgram.objects.filter(original_child_id__in=ids, archived_child__isnull=True).update(
+                archived_child=Subquery(
+                    ArchivedChild.objects.filter(original_id=OuterRef('original_child_id')).values('pk')[:1]
+                )
+            )
+            Child.all_objects.filter(pk__in=ids).delete()
+
+            originals = [(child.image_data.storage, child.image_data.name) for child in children if child.image_data]
+            transaction.on_commit(lambda: _delete_files(originals))
+    except Exception:
+        _delete_files(copied)
+        raise
+    if children:
+        bump_data_version()
+    return len(children)
+
+
+def _delete_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete %s during archiving.", name, exc_info=True)
+
+
+def archive_exited_children(batch_size=500):
+    """Archives exited children (and all their enrollments). Returns the count."""
+    total = 0
+    while True:
+        archived = _archive_child_batch(batch_size)
+        if not archived:
+            return total
+        total += archived
+        logger.info("Archived %s exited children so far.", total)
+
+
+def archive_closed_enrollments(batch_size=500):
+    """Archives enrollments that ended before the cutoff. Returns the count."""
+    total = 0
+    while True:
+        with forecast_receivers_disconnected(), transaction.atomic():
+            enrollments = list(closed_enrollments_due().order_by('pk').select_for_update()[:batch_size])
+            if not enrollments:
+                return total
+            _archive_enrollments(enrollments)
+            ChildProgram.all_objects.filter(pk__in=[e.pk for e in enrollments]).delete()
+        bump_data_version()
+        total += len(enrollments)
+        logger.info("Archived %s closed enrollments so far.", total)
@@ -0,0 +1,104 @@
+"""
+Authentication backend that verifies passwords on a bounded thread pool.
+
+PBKDF2 releases the GIL, so a small pool caps how many CPU-heavy hashes run
+at once during a login rush and leaves the remaining cores for API traffic.
+Callers beyond the pool and its queue are turned away instead of piling up
+behind it: the login fails, and the token endpoint answers 429 (see
+`login_was_busy`).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import PermissionDenied
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class LoginBusy(PermissionDenied):
+    """
+    Raised when no hashing slot frees up in time. Django's `authenticate()`
+    treats PermissionDenied as a failed login, so the admin login form shows
+    its usual error rather than a 500.
+    """
+
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _slots = threading.BoundedSemaphore(settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE_SIZE)
+                _pool = ThreadPoolExecutor(max_workers=settings.LOGIN_HASH_WORKERS,
+                                           thread_name_prefix='password-hash')
+    return _pool, _slots
+
+
+def run_hash(fn, *args):
+    """Runs a hashing function on the pool and waits for its result."""
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=settings.LOGIN_HASH_QUEUE_TIMEOUT):
+        raise LoginBusy("Too many sign-ins in progress. Please try again shortly.")
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def login_was_busy(request):
+    """True if the last authenticate() call on `request` was turned away by LoginBusy."""
+    return getattr(request, '_smile_login_busy', False)
+
+
+def _verify(raw_password, encoded, rehash):
+    """
+    Returns `(valid, new_hash)`. `new_hash` is set when the stored hash uses
+    outdated parameters and rehashing is enabled.
+    """
+    outdated = []
+    valid = check_password(raw_password, encoded, setter=outdated.append if rehash else None)
+    return valid, (make_password(raw_password) if valid and outdated else None)
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend whose password checks run through `run_hash`. Upgrading
+    outdated hashes on login is controlled by LOGIN_REHASH_PASSWORDS.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            return self._authenticate(UserModel, username, password)
+        except LoginBusy:
+            if request is not None:
+                request._smile_login_busy = True
+            raise
+
+    def _authenticate(self, UserModel, username, password):
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            run_hash(make_password, password)
+            return None
+
+        valid, new_hash = run_hash(_verify, password, user.password, settings.LOGIN_REHASH_PASSWORDS)
+        if new_hash:
+            user.password = new_hash
+            user.save(update_fields=['password'])
+
+        if valid and self.user_can_authenticate(user):
+            return user
+        return None
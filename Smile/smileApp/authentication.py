@@ -0,0 +1,16 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .db_router import is_user_pinned, pin_to_primary
+
+
+class ReplicaAwareJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that sends the rest of the request's reads to the
+    primary when the user has written within `REPLICA_PIN_SECONDS`.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and is_user_pinned(result[0].pk):
+            pin_to_primary()
+        return result
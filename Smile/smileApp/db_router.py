@@ -0,0 +1,148 @@
+"""
+Primary/replica database routing.
+
+Writes always go to `default`. Reads go to a replica only when the current
+context asks for one: safe-method API requests (see
+`smileApp.middleware.ReplicaRoutingMiddleware`) or code wrapped in
+`use_replica()` such as reports and exports. A user who has just written is
+pinned to the primary for `REPLICA_PIN_SECONDS` so they read their own
+writes, and a replica that is unreachable or lagging by more than
+`REPLICA_MAX_LAG_SECONDS` is skipped in favour of the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+PIN_COOKIE = 'smile_db_pin'
+
+# True while reads may be served by a replica.
+_use_replica = ContextVar('smile_use_replica', default=False)
+
+# alias -> (checked_at, healthy)
+_replica_health = {}
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+@contextmanager
+def use_replica():
+    """Route reads inside the block to a replica (if one is configured and healthy)."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Route reads inside the block to the primary."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def pin_to_primary():
+    """Send the remaining reads of the current context to the primary."""
+    _use_replica.set(False)
+
+
+# -------------------- READ-YOUR-WRITES --------------------
+
+def _pin_key(user_id):
+    return f"db-pin:user:{user_id}"
+
+
+def pin_user(user_id):
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_user_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+# -------------------- REPLICA HEALTH --------------------
+
+def replica_lag(alias):
+    """
+    Probes the replica and returns its replication lag in seconds. Only
+    PostgreSQL exposes lag; other backends (e.g. a local SQLite copy) report
+    0 once the probe succeeds. The probe reads a real table, so an empty or
+    mistyped database raises DatabaseError instead of passing.
+
+    A replica that has replayed everything it received is not lagging, however
+    long ago the last write was; the replay timestamp only measures lag while
+    WAL is still waiting to be applied.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+        if connection.vendor != 'postgresql':
+            return 0.0
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def is_replica_healthy(alias):
+    """Lag check, cached for `REPLICA_HEALTH_CHECK_INTERVAL` seconds per alias."""
+    now = time.monotonic()
+    checked_at, healthy = _replica_health.get(alias, (None, True))
+    if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+
+    try:
+        lag = replica_lag(alias)
+        healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning("Replica %s is %.1fs behind; reading from primary.", alias, lag)
+    except DatabaseError:
+        logger.warning("Replica %s is unreachable; reading from primary.", alias, exc_info=True)
+        healthy = False
+
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+# -------------------- ROUTER --------------------
+
+class PrimaryReplicaRouter:
+    """
+    Database router for `DATABASE_ROUTERS`. Replicas are listed in
+    `REPLICA_DATABASES` and are expected to mirror `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get():
+            return PRIMARY
+        # Reads inside a transaction must see that transaction's writes.
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        candidates = [alias for alias in replica_aliases() if is_replica_healthy(alias)]
+        return random.choice(candidates) if candidates else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,195 @@
+"""
+Fee income and program cost forecasting over ChildProgram enrollments.
+
+Enrollments are loaded once, in a single query, into NumPy columns and
+cached under a data version that changes whenever a Child, Program or
+ChildProgram is saved or deleted (see signals.py). The version is a database
+row, so a change made by any process invalidates every process's cache.
+Projections and what-if scenarios are then pure array arithmetic over the
+cached columns.
+"""
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, F, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .db_router import use_primary
+from .models import ChildProgram, ChildStatus, DataVersion
+
+VERSION_NAME = 'forecast'
+
+
+# -------------------- DATA VERSION --------------------
+
+def data_version():
+    """Returns `(version, bumped_at)`; `(0, None)` before the first bump."""
+    # A replica may not have seen the latest bump yet.
+    with use_primary():
+        row = DataVersion.objects.filter(name=VERSION_NAME).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def bump_data_version():
+    now = timezone.now()
+    bumped = DataVersion.objects.filter(name=VERSION_NAME).update(version=F('version') + 1, updated_at=now)
+    if not bumped:
+        DataVersion.objects.get_or_create(name=VERSION_NAME, defaults={'updated_at': now})
+
+
+# -------------------- TERMS --------------------
+
+def term_index(dates):
+    """
+    Maps dates (or ISO date strings) to a running term number: terms split
+    the calendar year into FORECAST_TERMS_PER_YEAR equal runs of months.
+    """
+    months = np.asarray(dates, dtype='datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return months * settings.FORECAST_TERMS_PER_YEAR // 12
+
+
+def term_label(index):
+    per_year = settings.FORECAST_TERMS_PER_YEAR
+    return f"{1970 + index // per_year}-T{index % per_year + 1}"
+
+
+# -------------------- ENROLLMENT COLUMNS --------------------
+
+def load_enrollments(first_term):
+    """
+    Returns enrollments still running at or after `first_term` as a dict of
+    NumPy columns, plus the program and location labels behind the codes.
+    """
+    version, bumped_at = data_version()
+    cache_key = f'forecast:enrollments:{version}:{first_term}'
+    columns = cache.get(cache_key)
+    if columns is not None:
+        return columns
+
+    per_year = settings.FORECAST_TERMS_PER_YEAR
+    year, term = divmod(first_term, per_year)
+    first_day = date(1970 + year, term * 12 // per_year + 1, 1)
+
+    # Reads follow the request's routing, except right after a change: a
+    # replica may not have it yet, and the result is cached under the new
+    # version.
+    recent = bumped_at is not None and timezone.now() - bumped_at < timedelta(
+        seconds=settings.REPLICA_MAX_LAG_SECONDS)
+
+    # Fees come back as floats and dates as ISO strings (parsed by NumPy in
+    # bulk), which keeps Django's per-row Decimal and date conversion out of
+    # the load.
+    with use_primary() if recent else nullcontext():
+        rows = list(
+            ChildProgram.objects
+            .filter(end_date__gte=first_day)
+            .annotate(
+                fee=Cast('fees_per_term', FloatField()),
+                start=Cast('start_date', CharField()),
+                end=Cast('end_date', CharField()),
+            )
+            .values_list('program_id', 'program__title', 'location', 'child__status', 'fee', 'start', 'end')
+        )
+
+    if rows:
+        program_ids, titles, locations, statuses, fees, starts, ends = zip(*rows)
+    else:
+        program_ids = titles = locations = statuses = fees = starts = ends = ()
+
+    program_keys, program_codes = np.unique(np.array(program_ids, dtype=np.int64), return_inverse=True)
+    location_keys, location_codes = np.unique(np.array(locations, dtype=object).astype(str), return_inverse=True)
+    status_keys, status_codes = np.unique(np.array(statuses, dtype=object).astype(str), return_inverse=True)
+    program_titles = dict(zip(program_ids, titles))
+
+    columns = {
+        'program_codes': program_codes,
+        'programs': [(int(pk), program_titles[pk]) for pk in program_keys],
+        'location_codes': location_codes,
+        'locations': location_keys.tolist(),
+        'status_codes': status_codes,
+        'statuses': status_keys.tolist(),
+        'fees': np.array(fees, dtype=np.float64),
+        'start_terms': term_index(starts),
+        'end_terms': term_index(ends),
+    }
+    cache.set(cache_key, columns, settings.FORECAST_CACHE_TIMEOUT)
+    return columns
+
+
+# -------------------- PROJECTION --------------------
+
+def _group_sum(codes, groups, matrix):
+    """Sums the rows of an (enrollments x terms) matrix per group code."""
+    terms = matrix.shape[1]
+    flat = (codes[:, None] * terms + np.arange(terms)).ravel()
+    return np.bincount(flat, weights=matrix.ravel(), minlength=groups * terms).reshape(groups, terms)
+
+
+def forecast(terms=6, fee_change=0.0, growth=0.0, cost_per_child=None, half_rate=0.5):
+    """
+    Projects fee income, program cost and billable enrollments for the next
+    `terms` terms, starting with the current one.
+
+    What-if parameters:
+    - fee_change: relative change applied to every fee (0.05 = +5%)
+    - growth: enrollment growth per term, compounded (0.02 = +2% per term)
+    - cost_per_child: program cost per billable enrollment per term
+      (defaults to FORECAST_COST_PER_CHILD)
+    - half_rate: share of the fee paid by children on Half status
+    """
+    if cost_per_child is None:
+        cost_per_child = settings.FORECAST_COST_PER_CHILD
+
+    first_term = int(term_index(timezone.localdate()))
+    data = load_enrollments(first_term)
+    term_numbers = first_term + np.arange(terms)
+
+    rates = {ChildStatus.FULL: 1.0, ChildStatus.HALF: half_rate, ChildStatus.EXITED: 0.0}
+    status_rates = np.array([rates.get(status, 0.0) for status in data['statuses']], dtype=np.float64)
+    rate = status_rates[data['status_codes']]
+
+    active = (data['start_terms'][:, None] <= term_numbers) & (data['end_terms'][:, None] >= term_numbers)
+    billable = active & (rate > 0)[:, None]
+    income = active * (data['fees'] * (1 + fee_change) * rate)[:, None]
+
+    # Growth scales every enrollment in a term alike, so it is applied after grouping.
+    scale = (1 + growth) ** np.arange(terms)
+
+    def breakdown(codes, groups):
+        counts = _group_sum(codes, groups, billable.astype(np.float64)) * scale
+        fees = _group_sum(codes, groups, income) * scale
+        return fees, counts * cost_per_child, counts
+
+    program_income, program_cost, program_count = breakdown(data['program_codes'], len(data['programs']))
+    location_income, location_cost, location_count = breakdown(data['location_codes'], len(data['locations']))
+
+    def series(income, cost, count):
+        return {
+            'income': np.round(income, 2).tolist(),
+            'cost': np.round(cost, 2).tolist(),
+            'net': np.round(income - cost, 2).tolist(),
+            'enrollments': np.round(count, 1).tolist(),
+        }
+
+    return {
+        'terms': [term_label(int(t)) for t in term_numbers],
+        'scenario': {
+            'fee_change': fee_change,
+            'growth': growth,
+            'cost_per_child': cost_per_child,
+            'half_rate': half_rate,
+        },
+        'total': series(program_income.sum(axis=0), program_cost.sum(axis=0), program_count.sum(axis=0)),
+        'programs': [
+            {'program_id': pk, 'title': title, **series(program_income[i], program_cost[i], program_count[i])}
+            for i, (pk, title) in enumerate(data['programs'])
+        ],
+        'locations': [
+            {'location': location, **series(location_income[i], location_cost[i], location_count[i])}
+            for i, location in enumerate(data['locations'])
+        ],
+    }
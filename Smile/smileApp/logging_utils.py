@@ -0,0 +1,128 @@
+"""
+Logging helpers referenced from `LOGGING` in settings.
+
+Records are handed to a background thread through a bounded queue, so the
+request thread never formats a message or touches a stream. Access-control logs
+carry a `decision` attribute; high-volume "allow" records are sampled while
+"deny" records are always kept.
+"""
+from itertools import count
+from logging.handlers import QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+
+# Extra attributes copied into structured output when present on a record.
+STRUCTURED_FIELDS = ('decision', 'user', 'role', 'method', 'view')
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleAllowFilter(logging.Filter):
+    """
+    Keeps one in `rate` records marked `decision='allow'`; every other
+    record (including all denials) passes.
+    """
+
+    def __init__(self, rate=100, name=''):
+        super().__init__(name)
+        self.rate = max(int(rate), 1)
+        self._counter = count()
+
+    def filter(self, record):
+        if getattr(record, 'decision', None) != 'allow':
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Block rather than fail when the queue is full; the thread is draining it.
+        self.queue.put(self._sentinel)
+
+
+class BackgroundQueueHandler(logging.Handler):
+    """
+    Hands records to a background thread through a bounded queue.
+
+    The thread writes to a FileHandler when `filename` is given, otherwise
+    to a StreamHandler on `stream`. The formatter configured for this
+    handler is applied by that target, i.e. on the background thread. When
+    the queue already holds `queue_size` records, new ones are dropped and
+    counted in `dropped` rather than growing memory without bound.
+
+    This is deliberately a plain Handler rather than a QueueHandler:
+    Python 3.12+ dictConfig builds QueueHandler subclasses itself and would
+    reject these arguments.
+    """
+
+    def __init__(self, stream=None, filename=None, encoding='utf-8', queue_size=10000):
+        super().__init__()
+        if filename:
+            self.target = logging.FileHandler(filename, encoding=encoding)
+        else:
+            self.target = logging.StreamHandler(stream)
+        self.queue_size = queue_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop_listener)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        # Started on first use in each process: a thread started before a
+        # fork (e.g. gunicorn --preload) does not exist in the child.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue_size)
+                self.listener = _Listener(self.queue, self.target, respect_handler_level=True)
+                self.listener.start()
+                self._pid = os.getpid()
+
+    def emit(self, record):
+        # The queue is in-process, so the record is passed as is; formatting
+        # is left to the listener thread.
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop_listener(self):
+        """Drains the queue and stops the thread, if this process started one."""
+        with self._start_lock:
+            if self.listener is None or self._pid != os.getpid():
+                return
+            listener, self.listener, self._pid = self.listener, None, None
+        listener.stop()
+
+    def close(self):
+        self.stop_listener()
+        self.target.close()
+        super().close()
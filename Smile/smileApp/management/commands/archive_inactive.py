@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from smileApp.archiving import (
+    archive_exited_children, archive_closed_enrollments,
+    exited_children_due, closed_enrollments_due,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move exited children and long-closed enrollments (with photos and assessments) "
+        "into the archive tables. Intended to run on a schedule, e.g. nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Rows moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many rows are due for archiving.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(
+                f"Due for archiving: {exited_children_due().count()} children, "
+                f"{closed_enrollments_due().count()} enrollments."
+            )
+            return
+
+        # Children first: archiving a child also archives all of its enrollments.
+        children = archive_exited_children(batch_size=options['batch_size'])
+        enrollments = archive_closed_enrollments(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {children} children and {enrollments} closed enrollments."
+        ))
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import logging
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from smileApp.logging_utils import BackgroundQueueHandler
+from smileApp.permissions import RoleBasedPermission
+
+
+def _user(username, groups=(), is_superuser=False):
+    # Stand-in for a User so the benchmark measures the permission logic and
+    # its logging, not the group query.
+    return SimpleNamespace(
+        username=username,
+        is_authenticated=True,
+        is_superuser=is_superuser,
+        groups=SimpleNamespace(values_list=lambda *args, **kwargs: list(groups)),
+    )
+
+
+SCENARIOS = [
+    ('superuser allow', _user('root', is_superuser=True), 'GET', 'child'),
+    ('manager allow', _user('manny', ['Manager']), 'PATCH', 'child'),
+    ('viewer allow', _user('vera', ['Viewer']), 'GET', 'program'),
+    ('viewer deny', _user('vera', ['Viewer']), 'POST', 'program'),
+]
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the logging overhead of RoleBasedPermission.has_permission"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200_000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        permission = RoleBasedPermission()
+        logger = logging.getLogger('smileApp.permissions')
+
+        self.stdout.write(
+            f"smileApp.permissions effective level: {logging.getLevelName(logger.getEffectiveLevel())}"
+        )
+        self.stdout.write(f"{'scenario':<18}{'logging off':>14}{'configured':>14}{'overhead':>12}")
+
+        for name, user, method, basename in SCENARIOS:
+            request = SimpleNamespace(user=user, method=method)
+            view = SimpleNamespace(basename=basename)
+
+            logging.disable(logging.CRITICAL)
+            try:
+                baseline = self._time(permission, request, view, iterations)
+            finally:
+                logging.disable(logging.NOTSET)
+            with self._discard_output(logger):
+                configured = self._time(permission, request, view, iterations)
+
+            self.stdout.write(
+                f"{name:<18}{baseline:>11.0f} ns{configured:>11.0f} ns{configured - baseline:>+9.0f} ns"
+            )
+
+    @contextmanager
+    def _discard_output(self, logger):
+        """
+        Points background writers at /dev/null while timing, so denials are
+        still logged in full without flooding the terminal.
+        """
+        handlers = []
+        while logger is not None:
+            handlers += [h for h in logger.handlers if isinstance(h, BackgroundQueueHandler)
+                         and type(h.target) is logging.StreamHandler]
+            logger = logger.parent if logger.propagate else None
+
+        with open(os.devnull, 'w') as devnull:
+            previous = [(handler, handler.target.setStream(devnull)) for handler in handlers]
+            try:
+                yield
+            finally:
+                for handler, stream in previous:
+                    # Let the listener drain the queue before restoring the stream.
+                    while not handler.queue.empty():
+                        time.sleep(0.01)
+                    with handler.target.lock:
+                        handler.target.setStream(stream)
+
+    def _time(self, permission, request, view, iterations):
+        has_permission = permission.has_permission
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            has_permission(request, view)
+        return (time.perf_counter_ns() - start) / iterations
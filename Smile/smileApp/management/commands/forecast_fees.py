@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from smileApp.db_router import use_replica
+from smileApp.forecasting import forecast
+
+
+class Command(BaseCommand):
+    help = "Project fee income and program costs per term from current enrollments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms', type=int, default=6, help="Number of terms to project.")
+        parser.add_argument('--fee-change', type=float, default=0.0,
+                            help="Relative fee change, e.g. 0.05 for +5%%.")
+        parser.add_argument('--growth', type=float, default=0.0,
+                            help="Enrollment growth per term, e.g. 0.02 for +2%%.")
+        parser.add_argument('--cost-per-child', type=float, default=None,
+                            help="Program cost per billable child per term.")
+        parser.add_argument('--half-rate', type=float, default=0.5,
+                            help="Share of the fee paid on Half status.")
+        parser.add_argument('--json', action='store_true', help="Print the full breakdown as JSON.")
+
+    def handle(self, *args, **options):
+        with use_replica():
+            result = forecast(
+                terms=options['terms'],
+                fee_change=options['fee_change'],
+                growth=options['growth'],
+                cost_per_child=options['cost_per_child'],
+                half_rate=options['half_rate'],
+            )
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        total = result['total']
+        self.stdout.write(f"{'term':<10}{'enrollments':>14}{'income':>14}{'cost':>14}{'net':>14}")
+        for i, term in enumerate(result['terms']):
+            self.stdout.write(
+                f"{term:<10}{total['enrollments'][i]:>14,.1f}{total['income'][i]:>14,.2f}"
+                f"{total['cost'][i]:>14,.2f}{total['net'][i]:>14,.2f}"
+            )
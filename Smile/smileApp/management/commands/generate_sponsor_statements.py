@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from smileApp.statements import generate_statements
+
+
+class Command(BaseCommand):
+    help = "Render year-end donation statements for every sponsor into media storage (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=timezone.now().year,
+                            help="Statement year (defaults to the current year).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Size of the rendering process pool (defaults to CPU count).")
+        parser.add_argument('--sponsor', type=int, action='append', dest='sponsor_ids',
+                            help="Only render this sponsor id. May be repeated.")
+        parser.add_argument('--overwrite', action='store_true',
+                            help="Re-render statements that already exist instead of skipping them.")
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(path, written, counts):
+            done = counts['written'] + counts['skipped']
+            if verbosity > 1:
+                self.stdout.write(f"{'wrote' if written else 'skipped'} {path}")
+            elif verbosity and done % 500 == 0:
+                self.stdout.write(f"{done} statements processed...")
+
+        counts = generate_statements(
+            options['year'],
+            workers=options['workers'],
+            overwrite=options['overwrite'],
+            sponsor_ids=options['sponsor_ids'],
+            progress=progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['year']} statements: {counts['written']} written, {counts['skipped']} already present."
+        ))
@@ -0,0 +1,98 @@
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a login rush against a running server: report logins/second "
+        "alongside API latency (p50/p99) measured at the same time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help="Base URL of the running server.")
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--login-threads', type=int, default=16, help="Concurrent login clients.")
+        parser.add_argument('--api-threads', type=int, default=4, help="Concurrent API clients.")
+        parser.add_argument('--api-path', default='/api/programs/', help="GET endpoint used to measure API latency.")
+        parser.add_argument('--duration', type=float, default=20.0, help="Seconds to run.")
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        credentials = json.dumps({'username': options['username'], 'password': options['password']}).encode()
+
+        def login():
+            request = Request(f"{base}/api/token/", data=credentials,
+                              headers={'Content-Type': 'application/json'}, method='POST')
+            with urlopen(request, timeout=30) as response:
+                return json.load(response)
+
+        try:
+            access = login()['access']
+        except (HTTPError, URLError) as exc:
+            raise CommandError(f"Initial login failed: {exc}")
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {'logins': 0, 'throttled': 0, 'login_errors': 0, 'api_errors': 0, 'api_latency': []}
+
+        def count(key, value=1):
+            with lock:
+                results[key] += value
+
+        def login_worker():
+            while not stop.is_set():
+                try:
+                    login()
+                    count('logins')
+                except HTTPError as exc:
+                    count('throttled' if exc.code == 429 else 'login_errors')
+                except URLError:
+                    count('login_errors')
+
+        def api_worker():
+            request = Request(f"{base}{options['api_path']}", headers={'Authorization': f"Bearer {access}"})
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with urlopen(request, timeout=30) as response:
+                        response.read()
+                except (HTTPError, URLError):
+                    count('api_errors')
+                    continue
+                with lock:
+                    results['api_latency'].append((time.perf_counter() - start) * 1000)
+
+        threads = (
+            [threading.Thread(target=login_worker, daemon=True) for _ in range(options['login_threads'])]
+            + [threading.Thread(target=api_worker, daemon=True) for _ in range(options['api_threads'])]
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latency = results['api_latency']
+        self.stdout.write(f"Duration:        {elapsed:.1f}s")
+        self.stdout.write(f"Logins/second:   {results['logins'] / elapsed:.1f} "
+                          f"({results['logins']} ok, {results['throttled']} throttled, "
+                          f"{results['login_errors']} failed)")
+        self.stdout.write(f"API requests:    {len(latency)} ok, {results['api_errors']} failed")
+        self.stdout.write(f"API latency:     p50 {_percentile(latency, 50):.1f} ms, "
+                          f"p99 {_percentile(latency, 99):.1f} ms")
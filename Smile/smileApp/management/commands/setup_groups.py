@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from smileApp.models import Child, Sponsor, Donation, Program, Staff
+from smileApp.models import Child, Sponsor, Donation, Program, Staff, ArchivedChild, ArchivedChildProgram
 
 class Command(BaseCommand):
     help = "Create default groups: Admin, Manager, Viewer with permissions"
@@ -17,7 +17,7 @@ class Command(BaseCommand):
         viewer_group = Group.objects.create(name='Viewer')
 
         # Get content types for models
-        models = [Child, Sponsor, Donation, Program, Staff]
+        models = [Child, Sponsor, Donation, Program, Staff, ArchivedChild, ArchivedChildProgram]
         permissions = Permission.objects.filter(content_type__model__in=[
             model._meta.model_name for model in models
         ])
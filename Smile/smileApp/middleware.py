@@ -0,0 +1,39 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from .db_router import PIN_COOKIE, use_replica, use_primary, pin_user
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves reads for safe-method requests from a read replica. Unsafe
+    requests run against the primary and pin the client to it for
+    `REPLICA_PIN_SECONDS`: by cookie (admin/session clients) and by user id
+    (JWT clients, checked in `ReplicaAwareJWTAuthentication`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES:
+            with use_replica():
+                return self.get_response(request)
+
+        with use_primary():
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and response.status_code < 500:
+            self._pin(request, response)
+        return response
+
+    def _pin(self, request, response):
+        response.set_cookie(
+            PIN_COOKIE, '1',
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_user(user.pk)
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # -------------------- ENUM CHOICES --------------------
 
@@ -12,6 +16,36 @@ class ChildStatus(models.TextChoices):
     HALF = 'Half', 'Half'
     EXITED = 'Inactive', 'Inactive'
 
+# -------------------- QUERYSETS --------------------
+
+def enrollment_archive_cutoff():
+    """Enrollments that ended before this date are due for archiving."""
+    return timezone.localdate() - timedelta(days=settings.ARCHIVE_CLOSED_ENROLLMENTS_AFTER_DAYS)
+
+class ChildQuerySet(models.QuerySet):
+    def active(self):
+        return self.exclude(status=ChildStatus.EXITED)
+
+    def exited(self):
+        return self.filter(status=ChildStatus.EXITED)
+
+class ActiveChildManager(models.Manager.from_queryset(ChildQuerySet)):
+    """Default manager: hides exited children. Use `Child.all_objects` for every row."""
+    def get_queryset(self):
+        return super().get_queryset().active()
+
+class ChildProgramQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(end_date__gte=enrollment_archive_cutoff())
+
+    def closed(self):
+        return self.filter(end_date__lt=enrollment_archive_cutoff())
+
+class ActiveChildProgramManager(models.Manager.from_queryset(ChildProgramQuerySet)):
+    """Default manager: hides long-closed enrollments. Use `ChildProgram.all_objects` for every row."""
+    def get_queryset(self):
+        return super().get_queryset().active()
+
 # -------------------- MODELS --------------------
 
 class Child(models.Model):
@@ -30,6 +64,9 @@ class Child(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ActiveChildManager()
+    all_objects = ChildQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -72,6 +109,9 @@ class ChildProgram(models.Model):
     end_date = models.DateField()
     fees_per_term = models.DecimalField(max_digits=10, decimal_places=2)
 
+    objects = ActiveChildProgramManager()
+    all_objects = ChildProgramQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.child.first_name} - {self.program.title}"
 
@@ -104,3 +144,79 @@ class Staff(models.Model):
         """
         groups = self.name.groups.values_list('name', flat=True)
         return ", ".join(groups) if groups else "No Group"
+
+# -------------------- ARCHIVE --------------------
+
+class ArchivedChild(models.Model):
+    """
+    A child moved out of `Child` by the archive_inactive command.
+    `original_id` is the child's id in the live table.
+    """
+
+    original_id = models.BigIntegerField(unique=True)
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    gender = models.CharField(max_length=10, choices=Gender.choices)
+    birth_date = models.DateField()
+    status = models.CharField(max_length=20, choices=ChildStatus.choices)
+    entry_date = models.DateField()
+    address = models.TextField(blank=True)
+    guardian_name = models.CharField(max_length=100)
+    guardian_contact = models.CharField(max_length=100)
+    image_data = models.ImageField(upload_to='archive/children_photos/', null=True, blank=True)
+    reason = models.CharField(max_length=100)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived child"
+        verbose_name_plural = "Archived children"
+        ordering = ['-archived_at']
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} (archived)"
+
+class ArchivedChildProgram(models.Model):
+    """
+    An enrollment moved out of `ChildProgram`. `archived_child` is set once
+    the child itself is archived; until then `original_child_id` points at
+    the live `Child`.
+    """
+
+    original_id = models.BigIntegerField(unique=True)
+    original_child_id = models.BigIntegerField(db_index=True)
+    archived_child = models.ForeignKey('ArchivedChild', on_delete=models.CASCADE, null=True, blank=True,
+                                       related_name='childprogram')
+    program = models.ForeignKey('Program', on_delete=models.SET_NULL, null=True)
+    level = models.CharField(max_length=100)
+    assesment = models.BinaryField()
+    location = models.TextField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+    fees_per_term = models.DecimalField(max_digits=10, decimal_places=2)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived child program"
+        ordering = ['-end_date']
+
+    def __str__(self):
+        return f"Child #{self.original_child_id} - {self.program.title if self.program else 'deleted program'}"
+
+# -------------------- DATA VERSIONS --------------------
+
+class DataVersion(models.Model):
+    """
+    A counter bumped whenever the data behind a cached computation changes
+    (see forecasting.bump_data_version). It lives in the database so web
+    workers and cron jobs all see the same version.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -4,6 +4,42 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def get_user_role(user):
+    """
+    Returns `(group names, role)` for a user, where role is 'admin',
+    'manager', 'viewer' or None. The group query runs once per user object.
+    """
+    cached = getattr(user, '_smile_role', None)
+    if cached is None:
+        groups = list(user.groups.values_list('name', flat=True))
+        groups_lower = {g.lower() for g in groups}
+
+        if user.is_superuser or 'admin' in groups_lower:
+            role = 'admin'
+        elif 'manager' in groups_lower:
+            role = 'manager'
+        elif 'viewer' in groups_lower:
+            role = 'viewer'
+        else:
+            role = None
+
+        cached = user._smile_role = (groups, role)
+    return cached
+
+
+def _decide(allowed, message, *args, **fields):
+    """
+    Logs an access decision and returns it. Grants log at DEBUG and denials
+    at INFO; arguments are only formatted if the level is enabled, and the
+    `fields` become structured attributes on the record.
+    """
+    level = logging.DEBUG if allowed else logging.INFO
+    if logger.isEnabledFor(level):
+        fields['decision'] = 'allow' if allowed else 'deny'
+        logger.log(level, message, *args, extra=fields)
+    return allowed
+
+
 class RoleBasedPermission(BasePermission):
     """
     Role-based permission class using Django Groups:
@@ -16,39 +52,36 @@ class RoleBasedPermission(BasePermission):
 
     def has_permission(self, request, view):
         user = request.user
+        method = request.method
 
         if not user or not user.is_authenticated:
-            logger.info("Access denied: User not authenticated.")
-            return False
+            return _decide(False, "Access denied: User not authenticated.", method=method)
 
-        # ✔ Superusers always allowed
+        # ✔ Superusers always allowed (no group query needed)
         if user.is_superuser:
-            logger.debug(f"Access granted: User '{user.username}' is superuser.")
-            return True
+            return _decide(True, "Access granted: User '%s' is superuser.", user.username,
+                           user=user.username, role='superuser', method=method)
 
-        # Get user's group names (lowercase for uniform comparison)
-        groups = list(user.groups.values_list('name', flat=True))
-        groups_lower = [g.lower() for g in groups]
-        method = request.method
+        groups, role = get_user_role(user)
 
         # ✔ Admin group: full access
-        if 'admin' in groups_lower:
-            logger.debug(f"Access granted: User '{user.username}' in 'admin' group.")
-            return True
+        if role == 'admin':
+            return _decide(True, "Access granted: User '%s' in 'admin' group.", user.username,
+                           user=user.username, role=role, method=method)
 
         # ✔ Manager group: all except DELETE
-        if 'manager' in groups_lower:
+        if role == 'manager':
             if method == 'DELETE':
-                logger.info(f"Access denied: Manager '{user.username}' attempted DELETE.")
-                return False
-            logger.debug(f"Access granted: Manager '{user.username}' with method {method}.")
-            return True
+                return _decide(False, "Access denied: Manager '%s' attempted DELETE.", user.username,
+                               user=user.username, role=role, method=method)
+            return _decide(True, "Access granted: Manager '%s' with method %s.", user.username, method,
+                           user=user.username, role=role, method=method)
 
         # ✔ Viewer group: safe methods only on specific views
-        if 'viewer' in groups_lower:
+        if role == 'viewer':
             if method not in SAFE_METHODS:
-                logger.info(f"Access denied: Viewer '{user.username}' attempted unsafe method '{method}'.")
-                return False
+                return _decide(False, "Access denied: Viewer '%s' attempted unsafe method '%s'.",
+                               user.username, method, user=user.username, role=role, method=method)
 
             allowed_views = {
                 'childsummaryview',  # APIView class name lowercased
@@ -59,15 +92,14 @@ class RoleBasedPermission(BasePermission):
             view_name = (getattr(view, 'basename', None) or view.__class__.__name__).lower()
 
             if view_name in allowed_views:
-                logger.debug(f"Access granted: Viewer '{user.username}' accessing '{view_name}'.")
-                return True
-            else:
-                logger.info(f"Access denied: Viewer '{user.username}' tried to access '{view_name}'.")
-                return False
+                return _decide(True, "Access granted: Viewer '%s' accessing '%s'.", user.username, view_name,
+                               user=user.username, role=role, method=method, view=view_name)
+            return _decide(False, "Access denied: Viewer '%s' tried to access '%s'.", user.username, view_name,
+                           user=user.username, role=role, method=method, view=view_name)
 
         # ❌ No allowed group found
-        logger.info(f"Access denied: User '{user.username}' with groups {groups} not permitted.")
-        return False
+        return _decide(False, "Access denied: User '%s' with groups %s not permitted.", user.username, groups,
+                       user=user.username, method=method)
 
     def has_object_permission(self, request, view, obj):
         # Apply the same logic for object-level permissions
@@ -1,26 +1,20 @@
 from rest_framework import serializers
-from .models import Child, Sponsor, Donation, Program, ChildProgram, Staff
+from .models import (
+    Child, Sponsor, Donation, Program, ChildProgram, Staff,
+    ArchivedChild, ArchivedChildProgram,
+)
 from django.contrib.auth.models import User
+from rest_framework.exceptions import AuthenticationFailed, Throttled
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .auth_backends import login_was_busy
+from .permissions import get_user_role
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
-        groups = list(user.groups.values_list('name', flat=True))
-        groups_lower = [g.lower() for g in groups]
-
-        if user.is_superuser:
-            role = 'admin'
-        elif 'admin' in groups_lower:
-            role = 'admin'
-        elif 'manager' in groups_lower:
-            role = 'manager'
-        elif 'viewer' in groups_lower:
-            role = 'viewer'
-        else:
-            role = None
+        groups, role = get_user_role(user)
 
         token['username'] = user.username
         token['role'] = role
@@ -29,20 +23,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
-        data = super().validate(attrs)
-
-        groups = list(self.user.groups.values_list('name', flat=True))
-        groups_lower = [g.lower() for g in groups]
-
-        if self.user.is_superuser:
-            role = 'admin'
-        elif 'admin' in groups_lower:
-            role = 'admin'
-        elif 'manager' in groups_lower:
-            role = 'manager'
-        elif 'viewer' in groups_lower:
-            role = 'viewer'
-        else:
+        try:
+            data = super().validate(attrs)
+        except AuthenticationFailed:
+            # The password was never checked: the hashing pool was saturated.
+            if login_was_busy(self.context.get('request')):
+                raise Throttled(detail="Too many sign-ins in progress. Please try again shortly.")
+            raise
+
+        # Resolved (and cached on self.user) while get_token built the tokens.
+        groups, role = get_user_role(self.user)
+        if role is None:
             raise serializers.ValidationError("User role not found. Contact admin.")
 
         # ➕ Add fields to the token response
@@ -74,7 +65,8 @@ class ProgramSerializer(serializers.ModelSerializer):
 class ChildProgramSerializer(serializers.ModelSerializer):
     child = ChildSerializer(read_only=True)
     program = ProgramSerializer(read_only=True)
-    child_id = serializers.PrimaryKeyRelatedField(queryset=Child.objects.all(), source='child', write_only=True)
+    # all_objects: exited children in their grace period can still be enrolled or re-pointed to.
+    child_id = serializers.PrimaryKeyRelatedField(queryset=Child.all_objects.all(), source='child', write_only=True)
     program_id = serializers.PrimaryKeyRelatedField(queryset=Program.objects.all(), source='program', write_only=True)
 
     class Meta:
@@ -93,6 +85,26 @@ class ChildDetailSerializer(serializers.ModelSerializer):
     def get_photo(self, obj):
         return obj.image_data.url if obj.image_data else None
 
+# -------------------- ARCHIVE SERIALIZERS --------------------
+
+class ArchivedChildProgramSerializer(serializers.ModelSerializer):
+    program = ProgramSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedChildProgram
+        fields = '__all__'
+
+class ArchivedChildSerializer(serializers.ModelSerializer):
+    childprogram = ArchivedChildProgramSerializer(many=True, read_only=True)
+    photo = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedChild
+        fields = '__all__'
+
+    def get_photo(self, obj):
+        return obj.image_data.url if obj.image_data else None
+
 # -------------------- SPONSOR / DONATION --------------------
 
 class SponsorSerializer(serializers.ModelSerializer):
@@ -1,5 +1,41 @@
-from django.db.models.signals import post_save
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Staff
+from .models import Staff, Child, Program, ChildProgram
+from .forecasting import bump_data_version
+
+
+FORECAST_SENDERS = (Child, Program, ChildProgram)
+
+
+def invalidate_forecast(sender, **kwargs):
+    # Cached forecast columns are keyed by this version.
+    bump_data_version()
+
+
+def _connect_forecast_receivers():
+    for sender in FORECAST_SENDERS:
+        post_save.connect(invalidate_forecast, sender=sender)
+        post_delete.connect(invalidate_forecast, sender=sender)
+
+
+@contextmanager
+def forecast_receivers_disconnected():
+    """
+    Disconnects the forecast receivers for the block, so Django can
+    fast-delete these models again. Bulk jobs such as archiving use it and
+    call bump_data_version() once per batch themselves. The disconnect is
+    process-wide, so use this from management commands, not requests.
+    """
+    for sender in FORECAST_SENDERS:
+        post_save.disconnect(invalidate_forecast, sender=sender)
+        post_delete.disconnect(invalidate_forecast, sender=sender)
+    try:
+        yield
+    finally:
+        _connect_forecast_receivers()
+
 
+_connect_forecast_receivers()
@@ -0,0 +1,148 @@
+"""
+Year-end sponsor statements.
+
+Donations are read in a single streamed pass ordered by sponsor, grouped in
+memory one sponsor at a time, and rendered on a process pool. Each worker
+writes its statement straight to the default storage, so output appears
+incrementally. A `.done` marker is saved after each statement, and a re-run
+skips only sponsors with a marker, so a statement cut short by a killed run
+is rendered again.
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+import os
+
+import django
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .db_router import use_replica
+from .models import Sponsor, Donation
+
+STATEMENT_TEMPLATE = 'smileApp/sponsor_statement.html'
+SPONSOR_FIELDS = ('id', 'name', 'email', 'phone', 'address', 'sponsor_type')
+DONATION_FIELDS = ('sponsor_id', 'amount', 'donation_date', 'payment_method', 'purpose')
+
+
+def statement_path(year, sponsor_id):
+    return f"statements/{year}/sponsor_{sponsor_id}.html"
+
+
+def done_marker_path(year, sponsor_id):
+    return statement_path(year, sponsor_id) + '.done'
+
+
+def build_statement(sponsor, donations, year):
+    """
+    Returns a plain (picklable) statement payload for one sponsor.
+    `sponsor` and `donations` are dicts as produced by `.values()`.
+    """
+    donations = [
+        {k: d[k] for k in DONATION_FIELDS if k != 'sponsor_id'}
+        for d in donations
+    ]
+    purposes = sorted({d['purpose'].strip() for d in donations if d['purpose'].strip()})
+    return {
+        'year': year,
+        'sponsor': sponsor,
+        'donations': donations,
+        'donation_count': len(donations),
+        'total': sum((d['amount'] for d in donations), Decimal('0.00')),
+        # The schema has no sponsor -> child/program link; the free-text
+        # purpose is the closest record of what each donation supported.
+        'supported': purposes,
+    }
+
+
+def stream_statements(year, sponsor_ids=None, chunk_size=2000):
+    """
+    Yields one statement payload per sponsor, merging two streams that are
+    both ordered by sponsor id: sponsors and that year's donations.
+    """
+    sponsors = Sponsor.objects.order_by('id')
+    donations = Donation.objects.filter(donation_date__year=year).order_by('sponsor_id', 'donation_date', 'id')
+    if sponsor_ids is not None:
+        sponsors = sponsors.filter(id__in=sponsor_ids)
+        donations = donations.filter(sponsor_id__in=sponsor_ids)
+
+    grouped = groupby(
+        donations.values(*DONATION_FIELDS).iterator(chunk_size=chunk_size),
+        key=itemgetter('sponsor_id'),
+    )
+    pending = next(grouped, None)
+
+    for sponsor in sponsors.values(*SPONSOR_FIELDS).iterator(chunk_size=chunk_size):
+        rows = []
+        # Donations for sponsors not in this pass (e.g. deleted mid-run) are skipped.
+        while pending is not None and pending[0] <= sponsor['id']:
+            if pending[0] == sponsor['id']:
+                rows = list(pending[1])
+            pending = next(grouped, None)
+        yield build_statement(sponsor, rows, year)
+
+
+def render_statement(statement):
+    return render_to_string(STATEMENT_TEMPLATE, {
+        'statement': statement,
+        'generated_at': timezone.now(),
+    })
+
+
+def write_statement(statement, overwrite=False):
+    """
+    Renders one statement and saves it to storage. Runs inside pool workers.
+    """
+    year, sponsor_id = statement['year'], statement['sponsor']['id']
+    path = statement_path(year, sponsor_id)
+    marker = done_marker_path(year, sponsor_id)
+    if default_storage.exists(marker):
+        if not overwrite:
+            return path, False
+        default_storage.delete(marker)
+    # Without a marker any existing file is a leftover from an interrupted write.
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(render_statement(statement).encode('utf-8')))
+    default_storage.save(marker, ContentFile(b''))
+    return path, True
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Smile.settings')
+    django.setup()
+
+
+def generate_statements(year, workers=None, overwrite=False, sponsor_ids=None, max_pending=None, progress=None):
+    """
+    Renders statements for every sponsor in parallel. Returns a dict of
+    counts: `written` and `skipped` (already completed by an earlier run).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    counts = {'written': 0, 'skipped': 0}
+
+    def collect(done):
+        for future in done:
+            path, written = future.result()
+            counts['written' if written else 'skipped'] += 1
+            if progress:
+                progress(path, written, counts)
+
+    with use_replica(), ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight = set()
+        for statement in stream_statements(year, sponsor_ids=sponsor_ids):
+            # Checked here as well so resumed runs do not pay for pickling.
+            if not overwrite and default_storage.exists(done_marker_path(year, statement['sponsor']['id'])):
+                counts['skipped'] += 1
+                continue
+            in_flight.add(pool.submit(write_statement, statement, overwrite))
+            if len(in_flight) >= max_pending:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(in_flight).done)
+
+    return counts
@@ -1,3 +1,610 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unittest
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connections, transaction, OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import archiving, auth_backends, db_router, forecasting, logging_utils, statements
+from .db_router import PrimaryReplicaRouter, PIN_COOKIE, use_replica
+from .throttling import LoginRateThrottle, TokenBucket
+from .models import (
+    Sponsor, Donation, Child, ChildStatus, Program, ChildProgram,
+    ArchivedChild, ArchivedChildProgram, DataVersion,
+)
+
+
+# -------------------- SPONSOR STATEMENTS --------------------
+
+def make_sponsor(name, **fields):
+    values = {
+        'email': f'{name.lower()}@example.com', 'phone': '1', 'address': 'x',
+        'sponsor_type': 'Company', 'preferred_contact': 'Email',
+    }
+    values.update(fields)
+    return Sponsor.objects.create(name=name, **values)
+
+
+def use_temp_media(test):
+    """Points MEDIA_ROOT at a temporary directory for the rest of `test`."""
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media, ignore_errors=True)
+    media_override = override_settings(MEDIA_ROOT=media)
+    media_override.enable()
+    test.addCleanup(media_override.disable)
+
+
+class SponsorStatementTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+        self.first = make_sponsor('Acme')
+        self.idle = make_sponsor('Idle')
+        self.last = make_sponsor('Zenith')
+        for sponsor, amount, day in ((self.first, '10.00', date(2024, 3, 1)), (self.first, '5.50', date(2024, 1, 9)),
+                                     (self.last, '20.00', date(2024, 6, 1)), (self.last, '99.00', date(2023, 6, 1))):
+            Donation.objects.create(sponsor=sponsor, amount=amount, donation_date=day,
+                                    payment_method='Card', purpose=' School fees ')
+
+    def test_stream_merges_sponsors_with_their_donations(self):
+        result = {s['sponsor']['id']: s for s in statements.stream_statements(2024, chunk_size=1)}
+
+        self.assertEqual(list(result), [self.first.pk, self.idle.pk, self.last.pk])
+        self.assertEqual([d['donation_date'] for d in result[self.first.pk]['donations']],
+                         [date(2024, 1, 9), date(2024, 3, 1)])
+        self.assertEqual(result[self.first.pk]['total'], Decimal('15.50'))
+        self.assertEqual(result[self.first.pk]['supported'], ['School fees'])
+        self.assertEqual((result[self.idle.pk]['donation_count'], result[self.idle.pk]['total']), (0, 0))
+        self.assertEqual(result[self.last.pk]['total'], Decimal('20.00'))
+
+    def _statement(self, sponsor):
+        return next(statements.stream_statements(2024, sponsor_ids=[sponsor.pk]))
+
+    def test_completed_statement_is_skipped_on_resume(self):
+        statement = self._statement(self.first)
+        self.assertTrue(statements.write_statement(statement)[1])
+        path = statements.statement_path(2024, self.first.pk)
+        default_storage.delete(path)
+        default_storage.save(path, ContentFile(b'kept'))
+
+        self.assertEqual(statements.write_statement(statement), (path, False))
+        with default_storage.open(path) as f:
+            self.assertEqual(f.read(), b'kept')
+
+    def test_statement_without_marker_is_rendered_again(self):
+        path = statements.statement_path(2024, self.first.pk)
+        default_storage.save(path, ContentFile(b'<html>cut sho'))
+
+        self.assertEqual(statements.write_statement(self._statement(self.first)), (path, True))
+        with default_storage.open(path) as f:
+            self.assertIn(b'Acme', f.read())
+        self.assertTrue(default_storage.exists(statements.done_marker_path(2024, self.first.pk)))
+
+    def test_command_skips_done_statements_unless_overwrite(self):
+        call_command('generate_sponsor_statements', year=2024, workers=1, stdout=StringIO())
+        path = statements.statement_path(2024, self.first.pk)
+        default_storage.delete(path)
+        default_storage.save(path, ContentFile(b'kept'))
+
+        out = StringIO()
+        call_command('generate_sponsor_statements', year=2024, workers=1, stdout=out)
+        self.assertIn('0 written, 3 already present', out.getvalue())
+
+        out = StringIO()
+        call_command('generate_sponsor_statements', year=2024, workers=1, overwrite=True, stdout=out)
+        self.assertIn('3 written, 0 already present', out.getvalue())
+        with default_storage.open(path) as f:
+            self.assertIn(b'Acme', f.read())
+
+
+class SponsorStatementViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_superuser=True))
+        self.sponsor = make_sponsor('Acme')
+        Donation.objects.create(sponsor=self.sponsor, amount='12.00', donation_date=date(2024, 2, 1),
+                                payment_method='Card', purpose='Books')
+        self.url = f'/api/sponsors/{self.sponsor.pk}/statement/'
+
+    def test_returns_json_statement(self):
+        response = self.client.get(self.url, {'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['donation_count'], 1)
+        self.assertEqual(response.data['total'], Decimal('12.00'))
+
+    def test_renders_html_statement(self):
+        response = self.client.get(self.url, {'year': 2024, 'render': 'html'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '2024 Donation Statement - Acme')
+
+    def test_rejects_invalid_year(self):
+        for year in ('abc', '0', '99999'):
+            with self.subTest(year=year):
+                self.assertEqual(self.client.get(self.url, {'year': year}).status_code, 400)
+
+
+# -------------------- REPLICA ROUTING --------------------
+
+@unittest.skipUnless(settings.REPLICA_DATABASES, "no replica configured (use --settings=Smile.test_settings)")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Under test the replica is a mirror of the test database, so these tests
+    check which connection served a read rather than its data.
+    TransactionTestCase is used because a mirror cannot see (and is blocked
+    by) the uncommitted writes of a TestCase transaction.
+    """
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.replica = settings.REPLICA_DATABASES[0]
+        cache.clear()
+        db_router._replica_health.clear()
+
+        self.user = User.objects.create(username='admin', is_superuser=True, is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.sponsor = Sponsor.objects.create(
+            name='Acme', email='acme@example.com', phone='1', address='x',
+            sponsor_type='Company', preferred_contact='Email',
+        )
+
+    def _sponsor_reads(self, do):
+        """Runs `do()` and returns the number of sponsor SELECTs per alias."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica:
+            response = do()
+
+        def count(queries):
+            return sum(1 for q in queries if q['sql'].startswith('SELECT') and 'smileApp_sponsor' in q['sql'])
+        return response, count(primary.captured_queries), count(replica.captured_queries)
+
+    def test_safe_request_reads_from_replica(self):
+        response, primary, replica = self._sponsor_reads(lambda: self.client.get(f'/api/sponsors/{self.sponsor.pk}/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((primary, replica), (0, 1))
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.patch(f'/api/sponsors/{self.sponsor.pk}/', {'phone': '2'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Drop the cookie: the user-id pin alone must route the next read.
+        self.client.cookies.clear()
+
+        response, primary, replica = self._sponsor_reads(lambda: self.client.get(f'/api/sponsors/{self.sponsor.pk}/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((primary, replica), (1, 0))
+
+        cache.clear()
+        _, primary, replica = self._sponsor_reads(lambda: self.client.get(f'/api/sponsors/{self.sponsor.pk}/'))
+        self.assertEqual((primary, replica), (0, 1))
+
+    def test_write_sets_pin_cookie(self):
+        response = self.client.patch(f'/api/sponsors/{self.sponsor.pk}/', {'phone': '2'}, format='json')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    def test_pin_cookie_routes_to_primary(self):
+        self.client.cookies[PIN_COOKIE] = '1'
+        _, primary, replica = self._sponsor_reads(lambda: self.client.get(f'/api/sponsors/{self.sponsor.pk}/'))
+        self.assertEqual((primary, replica), (1, 0))
+
+    def test_reads_in_atomic_block_use_primary(self):
+        router = PrimaryReplicaRouter()
+        with use_replica():
+            self.assertEqual(router.db_for_read(Sponsor), self.replica)
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Sponsor), 'default')
+
+    def test_reads_outside_replica_context_use_primary(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Sponsor), 'default')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch.object(db_router, 'replica_lag', side_effect=OperationalError("no such table")), \
+                self.assertLogs('smileApp.db_router', 'WARNING'), use_replica():
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Sponsor), 'default')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        lag = settings.REPLICA_MAX_LAG_SECONDS + 1
+        with mock.patch.object(db_router, 'replica_lag', return_value=lag), \
+                self.assertLogs('smileApp.db_router', 'WARNING'), use_replica():
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Sponsor), 'default')
+
+    def test_health_probe_reads_a_table(self):
+        self.assertEqual(db_router.replica_lag(self.replica), 0.0)
+
+    def _enrollment_reads(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica, use_replica():
+            forecasting.load_enrollments(0)
+
+        def count(queries):
+            return sum(1 for q in queries if 'smileApp_childprogram' in q['sql'])
+        return count(primary.captured_queries), count(replica.captured_queries)
+
+    def test_forecast_reads_primary_right_after_a_change(self):
+        forecasting.bump_data_version()
+        self.assertEqual(self._enrollment_reads(), (1, 0))
+
+    def test_forecast_reads_replica_once_change_has_settled(self):
+        forecasting.bump_data_version()
+        DataVersion.objects.update(
+            updated_at=timezone.now() - timedelta(seconds=settings.REPLICA_MAX_LAG_SECONDS + 1)
+        )
+        self.assertEqual(self._enrollment_reads(), (0, 1))
+
+
+# -------------------- LOGGING --------------------
+
+def make_record(msg, decision=None):
+    record = logging.LogRecord('smileApp.test', logging.INFO, __file__, 1, msg, (), None)
+    if decision:
+        record.decision = decision
+    return record
+
+
+class SampleAllowFilterTests(unittest.TestCase):
+    def test_keeps_one_in_rate_allows_and_every_deny(self):
+        sampler = logging_utils.SampleAllowFilter(rate=3)
+        allows = [sampler.filter(make_record('a', 'allow')) for _ in range(9)]
+        self.assertEqual(allows, [True, False, False] * 3)
+        self.assertTrue(all(sampler.filter(make_record('d', 'deny')) for _ in range(5)))
+        self.assertTrue(sampler.filter(make_record('plain')))
+
+
+class BackgroundQueueHandlerTests(unittest.TestCase):
+    def make_handler(self, queue_size=100):
+        self.stream = StringIO()
+        handler = logging_utils.BackgroundQueueHandler(stream=self.stream, queue_size=queue_size)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_full_queue_drops_and_counts(self):
+        handler = self.make_handler(queue_size=2)
+        # No listener thread, so nothing drains the queue.
+        with mock.patch.object(handler, '_ensure_listener'):
+            for i in range(5):
+                handler.emit(make_record(f'r{i}'))
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_stop_listener_drains_queue(self):
+        handler = self.make_handler()
+        # Hold the target so records pile up in the queue until stop.
+        with handler.target.lock:
+            for i in range(20):
+                handler.emit(make_record(f'r{i}'))
+        handler.stop_listener()
+        self.assertEqual(self.stream.getvalue().splitlines(), [f'r{i}' for i in range(20)])
+        self.assertIsNone(handler.listener)
+
+    def test_listener_restarts_in_forked_child(self):
+        handler = self.make_handler()
+        handler.emit(make_record('parent'))
+        parent_listener, parent_queue = handler.listener, handler.queue
+        self.addCleanup(parent_listener.stop)
+
+        with mock.patch.object(logging_utils.os, 'getpid', return_value=os.getpid() + 1):
+            handler.emit(make_record('child'))
+            self.assertIsNot(handler.listener, parent_listener)
+            self.assertIsNot(handler.queue, parent_queue)
+            handler.stop_listener()
+        self.assertIn('child', self.stream.getvalue().splitlines())
+
+
+# -------------------- ARCHIVING --------------------
+
+def make_child(**fields):
+    values = {
+        'first_name': 'Amani', 'last_name': 'Otieno', 'gender': 'Female', 'birth_date': date(2012, 5, 1),
+        'entry_date': date(2018, 1, 8), 'guardian_name': 'Grace', 'guardian_contact': '0700',
+        'reason': 'Orphaned',
+    }
+    values.update(fields)
+    return Child.all_objects.create(**values)
+
+
+def make_enrollment(child, program, end_date, **fields):
+    values = {
+        'level': 'Grade 1', 'assesment': b'assessment', 'location': 'Nairobi',
+        'start_date': end_date - timedelta(days=365), 'fees_per_term': 100,
+    }
+    values.update(fields)
+    return ChildProgram.all_objects.create(child=child, program=program, end_date=end_date, **values)
+
+
+class ArchivingTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.program = Program.objects.create(title='Literacy', description='Reading', location='Nairobi')
+        self.child = make_child(status=ChildStatus.EXITED)
+        self.child.image_data.save('amani.jpg', ContentFile(b'photo-bytes'))
+        self.photo_name = self.child.image_data.name
+        # Make the exit older than the grace period.
+        Child.all_objects.filter(pk=self.child.pk).update(
+            updated_at=timezone.now() - timedelta(days=settings.ARCHIVE_EXITED_CHILDREN_AFTER_DAYS + 1)
+        )
+        self.enrollment = make_enrollment(self.child, self.program, date.today(), assesment=b'blob-1')
+
+    def test_batch_copies_child_enrollments_blob_and_photo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archiving.archive_exited_children(), 1)
+
+        archived = ArchivedChild.objects.get(original_id=self.child.pk)
+        self.assertEqual(archived.first_name, 'Amani')
+        self.assertEqual(archived.status, ChildStatus.EXITED)
+        self.assertEqual(archived.image_data.name, 'archive/' + self.photo_name)
+        with archived.image_data.open('rb') as photo:
+            self.assertEqual(photo.read(), b'photo-bytes')
+
+        enrollment = archived.childprogram.get()
+        self.assertEqual(enrollment.original_id, self.enrollment.pk)
+        self.assertEqual(bytes(enrollment.assesment), b'blob-1')
+
+        self.assertFalse(Child.all_objects.filter(pk=self.child.pk).exists())
+        self.assertFalse(ChildProgram.all_objects.filter(pk=self.enrollment.pk).exists())
+        self.assertFalse(default_storage.exists(self.photo_name))
+
+    def test_failure_mid_batch_rolls_back_and_removes_copies(self):
+        with mock.patch.object(archiving, '_archive_enrollments', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                archiving.archive_exited_children()
+
+        self.assertTrue(Child.all_objects.filter(pk=self.child.pk).exists())
+        self.assertTrue(ChildProgram.all_objects.filter(pk=self.enrollment.pk).exists())
+        self.assertFalse(ArchivedChild.objects.exists())
+        self.assertTrue(default_storage.exists(self.photo_name))
+        self.assertFalse(default_storage.exists('archive/' + self.photo_name))
+
+    def test_rerun_is_a_no_op(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            archiving.archive_exited_children()
+            archiving.archive_closed_enrollments()
+
+        self.assertEqual(archiving.archive_exited_children(), 0)
+        self.assertEqual(archiving.archive_closed_enrollments(), 0)
+        self.assertEqual(ArchivedChild.objects.count(), 1)
+        self.assertEqual(ArchivedChildProgram.objects.count(), 1)
+
+    def test_batch_bumps_forecast_version_once(self):
+        make_enrollment(self.child, self.program, date.today(), level='Grade 2')
+        with mock.patch('smileApp.signals.bump_data_version') as per_row, \
+                mock.patch.object(archiving, 'bump_data_version') as per_batch:
+            archiving.archive_exited_children()
+        self.assertEqual(per_row.call_count, 0)
+        self.assertEqual(per_batch.call_count, 1)
+
+    def test_closed_enrollments_due_skips_exited_children(self):
+        long_ago = date.today() - timedelta(days=settings.ARCHIVE_CLOSED_ENROLLMENTS_AFTER_DAYS + 30)
+        make_enrollment(self.child, self.program, long_ago)
+        active_child = make_child(first_name='Baraka')
+        closed = make_enrollment(active_child, self.program, long_ago)
+
+        self.assertEqual(list(archiving.closed_enrollments_due()), [closed])
+        self.assertEqual(archiving.archive_closed_enrollments(), 1)
+        self.assertEqual(ArchivedChildProgram.objects.get().original_id, closed.pk)
+
+
+class InactiveChildViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_superuser=True))
+        self.child = make_child()
+
+    def test_mistaken_exit_can_be_undone(self):
+        url = f'/api/children/{self.child.pk}/'
+        self.assertEqual(self.client.patch(url, {'status': 'Inactive'}, format='multipart').status_code, 200)
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/children-detail/{self.child.pk}/').status_code, 200)
+        self.assertEqual(self.client.get('/api/children/').data, [])
+
+        self.assertEqual(self.client.patch(url, {'status': 'Full'}, format='multipart').status_code, 200)
+        self.assertEqual([c['id'] for c in self.client.get('/api/children/').data], [self.child.pk])
+
+    def test_enrollment_can_point_to_exited_child(self):
+        Child.all_objects.filter(pk=self.child.pk).update(status=ChildStatus.EXITED)
+        program = Program.objects.create(title='Literacy', description='Reading', location='Nairobi')
+        response = self.client.post('/api/childprograms/', {
+            'child_id': self.child.pk, 'program_id': program.pk, 'level': 'Grade 1', 'location': 'Nairobi',
+            'start_date': '2024-01-08', 'end_date': '2024-12-01', 'fees_per_term': '100.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(ChildProgram.all_objects.get().child_id, self.child.pk)
+
+
+# -------------------- FORECAST --------------------
+
+class ForecastViewTests(TestCase):
+    def setUp(self):
+        # Versions restart with each test's database; drop columns cached by earlier tests.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_superuser=True))
+
+    def test_rejects_non_finite_parameters(self):
+        for query in ('fee_change=nan', 'growth=inf', 'cost_per_child=-inf'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/forecast/?{query}').status_code, 400)
+
+    def test_version_bump_invalidates_cached_enrollments(self):
+        program = Program.objects.create(title='Literacy', description='Reading', location='Nairobi')
+        enrollment = make_enrollment(make_child(), program, date.today() + timedelta(days=400), fees_per_term=200)
+        self.assertEqual(forecasting.forecast(terms=1)['total']['income'], [200.0])
+
+        # A queryset update sends no signals, like a change made elsewhere
+        # before its process bumps the version.
+        ChildProgram.objects.filter(pk=enrollment.pk).update(fees_per_term=300)
+        self.assertEqual(forecasting.forecast(terms=1)['total']['income'], [200.0])
+        forecasting.bump_data_version()
+        self.assertEqual(forecasting.forecast(terms=1)['total']['income'], [300.0])
+
+    def test_projects_enrollment_income(self):
+        program = Program.objects.create(title='Literacy', description='Reading', location='Nairobi')
+        make_enrollment(make_child(), program, date.today() + timedelta(days=400), fees_per_term=200)
+        make_enrollment(make_child(status=ChildStatus.HALF), program, date.today() + timedelta(days=400),
+                        fees_per_term=200)
+
+        response = self.client.get('/api/forecast/?terms=1&fee_change=0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total']['income'], [330.0])
+        self.assertEqual(response.data['total']['enrollments'], [2.0])
+
+
+# -------------------- SIGN-IN AND ROLES --------------------
+
+class LoginBusyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='amina', password='secret-pass', is_staff=True)
+        busy = mock.patch.object(auth_backends, 'run_hash', side_effect=auth_backends.LoginBusy("busy"))
+        busy.start()
+        self.addCleanup(busy.stop)
+
+    def test_token_endpoint_returns_429(self):
+        response = APIClient().post('/api/token/', {'username': 'amina', 'password': 'secret-pass'}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_admin_login_fails_without_error(self):
+        response = self.client.post('/admin/login/', {'username': 'amina', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_spends_burst_then_refills(self):
+        bucket = TokenBucket(burst=2, per_second=1)
+        with mock.patch('smileApp.throttling.time.monotonic', return_value=100.0) as clock:
+            self.assertEqual([bucket.consume('a'), bucket.consume('a')], [0.0, 0.0])
+            self.assertEqual(bucket.consume('a'), 1.0)
+            self.assertEqual(bucket.consume('b'), 0.0)
+
+            clock.return_value = 100.5
+            self.assertEqual(bucket.consume('a'), 0.5)
+            clock.return_value = 101.0
+            self.assertEqual(bucket.consume('a'), 0.0)
+
+
+@override_settings(LOGIN_THROTTLE_RATES={'ip': {'burst': 3, 'per_second': 0.001},
+                                         'username': {'burst': 2, 'per_second': 0.001}})
+class LoginRateThrottleTests(SimpleTestCase):
+    def setUp(self):
+        LoginRateThrottle._buckets = None
+        self.addCleanup(setattr, LoginRateThrottle, '_buckets', None)
+
+    def attempt(self, username, ip='10.0.0.1'):
+        request = APIRequestFactory().post('/api/token/', {'username': username}, format='json', REMOTE_ADDR=ip)
+        return LoginRateThrottle().allow_request(Request(request, parsers=[JSONParser()]), None)
+
+    def test_limits_per_username_case_insensitively(self):
+        self.assertEqual([self.attempt('Amina'), self.attempt('amina', ip='10.0.0.2')], [True, True])
+        self.assertFalse(self.attempt('AMINA', ip='10.0.0.3'))
+
+    def test_limits_per_ip(self):
+        self.assertEqual([self.attempt(name) for name in ('a', 'b', 'c')], [True, True, True])
+        self.assertFalse(self.attempt('d'))
+        self.assertTrue(self.attempt('d', ip='10.0.0.2'))
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class PooledHashingTests(TestCase):
+    def reset_pool(self):
+        if auth_backends._pool is not None:
+            auth_backends._pool.shutdown(wait=True)
+        auth_backends._pool = auth_backends._slots = None
+
+    def setUp(self):
+        self.reset_pool()
+        self.addCleanup(self.reset_pool)
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE_SIZE=0, LOGIN_HASH_QUEUE_TIMEOUT=0.05)
+    def test_run_hash_refuses_when_slots_are_exhausted(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+
+        busy = threading.Thread(target=auth_backends.run_hash, args=(slow_hash,))
+        busy.start()
+        self.assertTrue(started.wait(5))
+        try:
+            with self.assertRaises(auth_backends.LoginBusy):
+                auth_backends.run_hash(len, 'x')
+        finally:
+            release.set()
+            busy.join()
+        self.assertEqual(auth_backends.run_hash(len, 'x'), 1)
+
+    def _login_with_outdated_hash(self):
+        # A salt this short makes the hasher ask for an update.
+        user = User.objects.create(username='amina', password=make_password('secret', salt='short', hasher='md5'))
+        user_id, old_hash = user.pk, user.password
+        self.assertEqual(auth_backends.PooledModelBackend().authenticate(None, 'amina', 'secret').pk, user_id)
+        return old_hash, User.objects.get(pk=user_id).password
+
+    @override_settings(LOGIN_REHASH_PASSWORDS=True, PASSWORD_HASHERS=FAST_HASHERS)
+    def test_outdated_hash_is_upgraded_on_login(self):
+        old_hash, new_hash = self._login_with_outdated_hash()
+        self.assertNotEqual(new_hash, old_hash)
+        self.assertTrue(new_hash.startswith('md5$'))
+
+    @override_settings(LOGIN_REHASH_PASSWORDS=False, PASSWORD_HASHERS=FAST_HASHERS)
+    def test_outdated_hash_is_kept_when_rehashing_is_off(self):
+        old_hash, new_hash = self._login_with_outdated_hash()
+        self.assertEqual(new_hash, old_hash)
+
+
+class RoleBasedPermissionTests(TestCase):
+    def client_for(self, group):
+        user = User.objects.create(username=group)
+        user.groups.add(Group.objects.create(name=group.capitalize()))
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def setUp(self):
+        self.program = Program.objects.create(title='Literacy', description='Reading', location='Nairobi')
+
+    def test_superuser_needs_no_group_query(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='root', is_superuser=True))
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.assertEqual(client.get('/api/programs/').status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if 'auth_user_groups' in q['sql']])
+
+    def test_manager_cannot_delete(self):
+        client = self.client_for('manager')
+        self.assertEqual(client.get('/api/sponsors/').status_code, 200)
+        self.assertEqual(client.delete(f'/api/programs/{self.program.pk}/').status_code, 403)
+
+    def test_viewer_reads_allowed_views_only(self):
+        client = self.client_for('viewer')
+        self.assertEqual(client.get('/api/programs/').status_code, 200)
+        self.assertEqual(client.get('/api/sponsors/').status_code, 403)
+        self.assertEqual(client.post('/api/programs/', {'title': 'x'}, format='json').status_code, 403)
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucket:
+    """
+    In-process token buckets keyed by string. Each key may spend up to
+    `burst` tokens, refilled at `per_second`.
+    """
+
+    max_keys = 10_000
+
+    def __init__(self, burst, per_second):
+        self.burst = float(burst)
+        self.per_second = float(per_second)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.per_second)
+
+    def consume(self, key):
+        """Takes one token; returns 0 on success or the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.per_second
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # Full buckets carry no state worth keeping.
+        for key in [k for k in self._buckets if self._refill(k, now) >= self.burst]:
+            del self._buckets[key]
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Token-bucket throttle for the token endpoint, applied per client IP and
+    per submitted username (rates in LOGIN_THROTTLE_RATES). Buckets live in
+    process memory, so each worker process enforces its own limits.
+    """
+
+    _buckets = None
+    _buckets_lock = threading.Lock()
+
+    @classmethod
+    def buckets(cls):
+        if cls._buckets is None:
+            with cls._buckets_lock:
+                if cls._buckets is None:
+                    cls._buckets = {
+                        scope: TokenBucket(**rate) for scope, rate in settings.LOGIN_THROTTLE_RATES.items()
+                    }
+        return cls._buckets
+
+    def allow_request(self, request, view):
+        buckets = self.buckets()
+        keys = {'ip': self.get_ident(request)}
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if username:
+            keys['username'] = str(username).lower()
+
+        self._wait = max(
+            (buckets[scope].consume(key) for scope, key in keys.items() if scope in buckets),
+            default=0.0,
+        )
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
@@ -4,7 +4,9 @@ from .views import (
     ChildViewSet, SponsorViewSet, DonationViewSet,
     ProgramViewSet, ChildProgramViewSet, StaffViewSet,
     ChildSummaryView, ChildDetailView, get_user_profile,
-    UserViewSet  # <-- add this import
+    UserViewSet,  # <-- add this import
+    ArchivedChildViewSet, ArchivedChildProgramViewSet,
+    ForecastView,
 )
 
 router = DefaultRouter()
@@ -15,6 +17,8 @@ router.register(r'programs', ProgramViewSet)
 router.register(r'childprograms', ChildProgramViewSet)
 router.register(r'staffs', StaffViewSet)
 router.register(r'users', UserViewSet)  # <-- register user endpoint here
+router.register(r'archived-children', ArchivedChildViewSet)
+router.register(r'archived-childprograms', ArchivedChildProgramViewSet)
 
 urlpatterns = [
     # Include all standard CRUD via router
@@ -24,6 +28,9 @@ urlpatterns = [
     path('children-summary/', ChildSummaryView.as_view(), name='children_summary'),
     path('children-detail/<int:pk>/', ChildDetailView.as_view(), name='child_detail'),
 
+    # Fee and cost forecast
+    path('forecast/', ForecastView.as_view(), name='forecast'),
+
     # User profile
     path('user/profile/', get_user_profile, name='get_user_profile'),
 ]
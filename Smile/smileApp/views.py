@@ -1,26 +1,38 @@
+import datetime
+import math
+
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from rest_framework import viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework.serializers import ModelSerializer
 
-from .models import Child, Sponsor, Donation, Program, ChildProgram, Staff
+from .models import (
+    Child, Sponsor, Donation, Program, ChildProgram, Staff,
+    ArchivedChild, ArchivedChildProgram,
+)
 from .serializers import (
     ChildDetailSerializer, ChildSummarySerializer, SponsorSerializer,
     DonationSerializer, ProgramSerializer, ChildProgramSerializer,
-    StaffSerializer
+    StaffSerializer, ArchivedChildSerializer, ArchivedChildProgramSerializer
 )
 from .permissions import RoleBasedPermission
+from .throttling import LoginRateThrottle
+from .statements import stream_statements, render_statement
+from .forecasting import forecast
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import CustomTokenObtainPairSerializer
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginRateThrottle]
 
 
 
@@ -51,8 +63,10 @@ class ChildDetailView(APIView):
     permission_classes = [IsAuthenticated, RoleBasedPermission]
 
     def get(self, request, pk):
+        # Detail lookups include exited children so they can still be viewed
+        # (and corrected) until they are archived.
         child = get_object_or_404(
-            Child.objects.prefetch_related(
+            Child.all_objects.prefetch_related(
                 Prefetch('childprogram', queryset=ChildProgram.objects.select_related('program'))
             ),
             pk=pk
@@ -66,6 +80,71 @@ class ChildViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     parser_classes = (MultiPartParser, FormParser)
 
+    def get_queryset(self):
+        # Only the list hides exited children; retrieve/update/destroy still
+        # reach them, so a child marked Inactive by mistake can be restored.
+        if self.action == 'list':
+            return Child.objects.all()
+        return Child.all_objects.all()
+
+    @action(detail=False, methods=['get'])
+    def inactive(self, request):
+        """Children marked Inactive that have not been archived yet."""
+        children = Child.all_objects.exited()
+        serializer = ChildSummarySerializer(children, many=True)
+        return Response(serializer.data)
+
+
+# ------------------- ARCHIVE VIEWS --------------------
+
+class ArchivedChildViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedChild.objects.prefetch_related(
+        Prefetch('childprogram', queryset=ArchivedChildProgram.objects.select_related('program'))
+    )
+    serializer_class = ArchivedChildSerializer
+    permission_classes = [IsAuthenticated, RoleBasedPermission]
+
+class ArchivedChildProgramViewSet(viewsets.ReadOnlyModelViewSet):
+    """Archived enrollments; ?child=<id> filters by the child's original id."""
+    queryset = ArchivedChildProgram.objects.select_related('program')
+    serializer_class = ArchivedChildProgramSerializer
+    permission_classes = [IsAuthenticated, RoleBasedPermission]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        child = self.request.query_params.get('child')
+        if child and child.isdigit():
+            queryset = queryset.filter(original_child_id=child)
+        return queryset
+
+
+# ------------------- FORECAST --------------------
+
+class ForecastView(APIView):
+    """
+    Projected fee income and program cost per term, program and location.
+    Query params: terms, fee_change, growth, cost_per_child, half_rate.
+    """
+    permission_classes = [IsAuthenticated, RoleBasedPermission]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            terms = int(params.get('terms', 6))
+            scenario = {
+                name: float(params[name])
+                for name in ('fee_change', 'growth', 'cost_per_child', 'half_rate')
+                if name in params
+            }
+        except ValueError:
+            return Response({"detail": "Forecast parameters must be numbers."}, status=400)
+        if not all(math.isfinite(value) for value in scenario.values()):
+            return Response({"detail": "Forecast parameters must be finite numbers."}, status=400)
+        if not 1 <= terms <= 60:
+            return Response({"detail": "terms must be between 1 and 60."}, status=400)
+
+        return Response(forecast(terms=terms, **scenario))
+
 
 # ------------------- OTHER CRUD --------------------
 
@@ -74,6 +153,26 @@ class SponsorViewSet(viewsets.ModelViewSet):
     serializer_class = SponsorSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
 
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        """
+        Year-end statement for one sponsor: ?year=YYYY (defaults to this year).
+        Add ?render=html to get the printable statement instead of JSON.
+        """
+        sponsor = self.get_object()
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return Response({"detail": "year must be an integer."}, status=400)
+        if not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+            return Response({"detail": f"year must be between {datetime.MINYEAR} and {datetime.MAXYEAR}."},
+                            status=400)
+
+        statement = next(stream_statements(year, sponsor_ids=[sponsor.pk]))
+        if request.query_params.get('render') == 'html':
+            return HttpResponse(render_statement(statement))
+        return Response(statement)
+
 class DonationViewSet(viewsets.ModelViewSet):
     queryset = Donation.objects.all()
     serializer_class = DonationSerializer
@@ -89,6 +188,12 @@ class ChildProgramViewSet(viewsets.ModelViewSet):
     serializer_class = ChildProgramSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
 
+    def get_queryset(self):
+        # As for children: closed enrollments leave the list, not the detail routes.
+        if self.action == 'list':
+            return ChildProgram.objects.all()
+        return ChildProgram.all_objects.all()
+
 class StaffViewSet(viewsets.ModelViewSet):
     queryset = Staff.objects.all()
     serializer_class = StaffSerializer